@@ -5,15 +5,25 @@ Provides endpoints for disaster alerts and severe weather warnings.
 
 from fastapi import APIRouter, Query, HTTPException
 from typing import List
-from services.alert_service import get_active_alerts, DisasterAlert
+from services.alert_service import get_alert_report, DisasterAlert
+from services.cache import async_ttl_cache
+from config import settings
 
 router = APIRouter()
 
+# Nearby locations (~1 km grid) share alert results for WEATHER_CACHE_TTL seconds.
+# Degraded reports (an upstream source failed) are not cached so the next request retries.
+cached_get_alert_report = async_ttl_cache(
+    ttl=settings.WEATHER_CACHE_TTL,
+    cache_if=lambda report: not report.degraded
+)(get_alert_report)
+
 
 @router.get("/active", response_model=List[DisasterAlert])
 async def get_alerts(
     lat: float = Query(..., description="Latitude coordinate", ge=-90, le=90),
-    lon: float = Query(..., description="Longitude coordinate", ge=-180, le=180)
+    lon: float = Query(..., description="Longitude coordinate", ge=-180, le=180),
+    max_alerts: int = Query(20, description="Maximum number of alerts returned", ge=1, le=100)
 ):
     """
     Get all active disaster alerts for a location.
@@ -34,8 +44,8 @@ async def get_alerts(
     **Returns:** List of active alerts with severity, recommendations, and affected areas
     """
     try:
-        alerts = await get_active_alerts(lat, lon)
-        return alerts
+        report = await cached_get_alert_report(lat, lon, max_alerts=max_alerts)
+        return report.alerts
     except Exception as e:
         raise HTTPException(
             status_code=500,
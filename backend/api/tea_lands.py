@@ -4,167 +4,386 @@ Provides endpoints for managing tea estate boundaries and properties.
 Uses PostGIS for geospatial data storage.
 """
 
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
-from pydantic import BaseModel
-from typing import Dict, Any, List
-from geoalchemy2.shape import from_shape, to_shape
-from shapely.geometry import shape, mapping
-import json
-
-from database import get_db
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy import select, insert, delete, func, bindparam, cast, JSON, Text
+from sqlalchemy.ext.asyncio import AsyncScalarResult, AsyncSession, async_sessionmaker
+from starlette.background import BackgroundTask
+from pydantic import BaseModel, ConfigDict
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional
+from datetime import datetime
+from geoalchemy2 import Geography
+import logging
+import orjson
+
+from database_session import get_db, get_sessionmaker
 from models import TeaEstate
+from services.geo_math import radius_bbox_degrees
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
 # Pydantic Models for API
+class GeoJSONGeometry(BaseModel):
+    """GeoJSON Polygon or MultiPolygon geometry"""
+    type: Literal["Polygon", "MultiPolygon"]
+    coordinates: list
+
+
 class TeaEstateCreate(BaseModel):
     """Schema for creating a new tea estate"""
     name: str
-    geometry: Dict[str, Any]  # GeoJSON geometry
-    area_hectares: float
+    geometry: GeoJSONGeometry
+    area_hectares: Optional[float] = None  # Ignored; area is computed by PostGIS
     properties: Dict[str, Any] = {}
 
 
 class TeaEstateResponse(BaseModel):
     """Schema for tea estate response"""
+    model_config = ConfigDict(from_attributes=True, arbitrary_types_allowed=False)
+    
     id: int
     name: str
-    geometry: Dict[str, Any]
-    area: float
+    geometry: GeoJSONGeometry
+    area: Optional[float] = None
+    created_at: Optional[datetime] = None
+
+
+class TeaEstateCreateResponse(BaseModel):
+    """Schema for the create estate response"""
+    status: str
+    message: str
+    data: TeaEstateResponse
+
+
+class EstateIds(BaseModel):
+    """IDs of created estates"""
+    ids: List[int]
+
+
+class TeaEstateBulkResponse(BaseModel):
+    """Schema for the bulk create estates response"""
+    status: str
+    message: str
+    data: EstateIds
+
+
+# Geometry Helpers
+
+def _geometry_from_geojson(geojson):
+    """
+    PostGIS expression parsing GeoJSON text straight into a WGS84 MultiPolygon.
     
-    class Config:
-        from_attributes = True
+    ST_GeomFromGeoJSON parses in C inside the database, so no Shapely object
+    graph or WKB re-encoding is built in Python. ST_Multi promotes Polygons to
+    match the MULTIPOLYGON column type.
+    """
+    return func.ST_Multi(func.ST_SetSRID(func.ST_GeomFromGeoJSON(geojson), 4326))
 
 
 # API Endpoints
 
-@router.post("/estates", response_model=Dict[str, Any])
+@router.post("/estates", response_model=TeaEstateCreateResponse)
 async def create_estate(
     estate: TeaEstateCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Create a new tea estate with geometry.
     
     - **name**: Estate name
     - **geometry**: GeoJSON geometry (Polygon or MultiPolygon)
-    - **area_hectares**: Total area in hectares
+    - **area_hectares**: Ignored; total area is computed from the geometry by PostGIS
     - **properties**: Additional properties (optional)
     
     Returns the created estate with database ID.
     """
-    print(f"🌿 Creating new estate: {estate.name} ({estate.area_hectares} ha)")
+    logger.info("🌿 Creating new estate: %s", estate.name)
     
     try:
-        # Convert GeoJSON geometry to Shapely geometry
-        geom_shape = shape(estate.geometry)
-        
-        # Validate geometry type
-        if geom_shape.geom_type not in ['Polygon', 'MultiPolygon']:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid geometry type: {geom_shape.geom_type}. Must be Polygon or MultiPolygon."
-            )
-        
-        # Create database model
-        db_estate = TeaEstate(
+        # Bind the GeoJSON text directly (geometry type is validated by GeoJSONGeometry).
+        # Same single INSERT as the bulk path: the GeoJSON is parsed once, the
+        # area comes from the generated total_area_hectares column, and
+        # RETURNING replaces a refresh SELECT.
+        stmt = insert(TeaEstate).values(
             name=estate.name,
-            geometry=from_shape(geom_shape, srid=4326),  # WGS84
-            total_area_hectares=estate.area_hectares
-        )
+            geometry=_geometry_from_geojson(orjson.dumps(estate.geometry.model_dump()).decode())
+        ).returning(TeaEstate.id, TeaEstate.name, TeaEstate.total_area_hectares, TeaEstate.created_at)
         
         # Save to database
-        db.add(db_estate)
-        db.commit()
-        db.refresh(db_estate)
+        row = (await db.execute(stmt)).one()
+        await db.commit()
         
-        print(f"✅ Estate saved with ID: {db_estate.id}")
+        logger.info("✅ Estate saved with ID: %s", row.id)
         
         return {
             "status": "success",
             "message": "Estate saved to database",
             "data": {
-                "id": db_estate.id,
-                "name": db_estate.name,
+                "id": row.id,
+                "name": row.name,
                 "geometry": estate.geometry,  # Return original GeoJSON
-                "area": db_estate.total_area_hectares
+                "area": row.total_area_hectares,
+                "created_at": row.created_at
             }
         }
     
     except Exception as e:
-        db.rollback()
-        print(f"❌ Error creating estate: {e}")
+        await db.rollback()
+        logger.exception("❌ Error creating estate: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/estates:bulk", response_model=TeaEstateBulkResponse)
+async def create_estates_bulk(
+    estates: List[TeaEstateCreate],
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Create many tea estates in one request.
+    
+    All rows are sent as a single multi-row INSERT and committed once, so the
+    commit and driver round-trip are paid once per batch instead of per estate.
+    Area is filled in by the generated `total_area_hectares` column, so each
+    GeoJSON document is parsed once and no follow-up statement is needed.
+    
+    Returns the database IDs of the created estates, in request order.
+    """
+    logger.info("🌿 Bulk creating %d estates", len(estates))
+    
+    rows = [
+        {"p_name": estate.name, "p_geojson": orjson.dumps(estate.geometry.model_dump()).decode()}
+        for estate in estates
+    ]
+    
+    if not rows:
+        return {"status": "success", "message": "No estates to save", "data": {"ids": []}}
+    
+    stmt = insert(TeaEstate).values(
+        name=bindparam("p_name"),
+        geometry=_geometry_from_geojson(bindparam("p_geojson"))
+    ).returning(TeaEstate.id, sort_by_parameter_order=True)
+    
+    try:
+        result = await db.execute(stmt, rows)
+        ids = list(result.scalars())
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        logger.exception("❌ Error bulk creating estates: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
+    
+    logger.info("✅ Saved %d estates", len(ids))
+    
+    return {
+        "status": "success",
+        "message": f"{len(ids)} estates saved to database",
+        "data": {"ids": ids}
+    }
 
 
-@router.get("/estates", response_model=List[Dict[str, Any]])
-async def get_estates(db: Session = Depends(get_db)):
+def _estate_geojson(tolerance: float = 0.0):
+    """
+    Estate geometry rendered as GeoJSON text by PostGIS.
+    
+    A positive `tolerance` (degrees) simplifies the geometry for display with
+    ST_SimplifyPreserveTopology and limits output to 6 decimals (~10 cm).
+    """
+    if tolerance > 0:
+        return func.ST_AsGeoJSON(func.ST_SimplifyPreserveTopology(TeaEstate.geometry, tolerance), 6)
+    return func.ST_AsGeoJSON(TeaEstate.geometry)
+
+
+def _select_estates_geojson(tolerance: float = 0.0):
+    """Select estate columns with the geometry rendered as GeoJSON by PostGIS."""
+    return select(
+        TeaEstate.id,
+        TeaEstate.name,
+        _estate_geojson(tolerance).label("geom"),
+        TeaEstate.total_area_hectares,
+        TeaEstate.created_at
+    )
+
+
+def _select_estates_json(tolerance: float = 0.0):
+    """
+    Select one JSON object string per estate.
+    
+    Postgres builds every object with json_build_object, so rows can be
+    streamed to the client without any per-row decoding in Python.
+    """
+    estate_json = func.json_build_object(
+        "id", TeaEstate.id,
+        "name", TeaEstate.name,
+        "geometry", cast(_estate_geojson(tolerance), JSON),
+        "area", TeaEstate.total_area_hectares,
+        "created_at", TeaEstate.created_at
+    )
+    return select(cast(estate_json, Text))
+
+
+# Rows fetched per server-side cursor round-trip when streaming estates
+STREAM_BATCH_SIZE = 200
+
+
+async def _stream_estates_json(
+    db: AsyncSession,
+    estates: AsyncScalarResult,
+    first_batch: List[str]
+) -> AsyncIterator[bytes]:
+    """
+    Stream estates as a JSON array from an open server-side cursor.
+    
+    `first_batch` has already been fetched from `estates`; the rest is read
+    as the response is sent. Closes `db` when done (get_estates also closes
+    it in a background task, in case the body is never iterated).
+    """
+    count = 0
+    try:
+        yield b"["
+        for estate_json in first_batch:
+            yield (b"," if count else b"") + estate_json.encode()
+            count += 1
+        async for estate_json in estates:
+            yield (b"," if count else b"") + estate_json.encode()
+            count += 1
+        yield b"]"
+    except Exception as e:
+        logger.exception("❌ Error streaming estates: %s", e)
+        raise
+    finally:
+        await db.close()
+    
+    logger.info("📊 Streamed %d estates from database", count)
+
+
+def _estate_row_to_dict(row) -> Dict[str, Any]:
+    """Convert a row from _select_estates_geojson() to the API response shape."""
+    return {
+        "id": row.id,
+        "name": row.name,
+        "geometry": orjson.loads(row.geom),
+        "area": row.total_area_hectares,
+        "created_at": row.created_at
+    }
+
+
+@router.get("/estates", response_model=List[TeaEstateResponse])
+async def get_estates(
+    request: Request,
+    tolerance: float = Query(
+        0.0001,
+        ge=0,
+        description="Simplification tolerance in degrees (0.0001 ≈ 10 m); 0 returns full precision"
+    ),
+    session_factory: async_sessionmaker[AsyncSession] = Depends(get_sessionmaker)
+):
     """
     Get all saved tea estates.
     
-    Returns list of estates with GeoJSON geometries.
+    Returns list of estates with GeoJSON geometries, simplified for map
+    rendering unless `tolerance=0`. The JSON array is streamed row by row,
+    so memory use does not grow with the number of estates.
+    
+    The list changes with every create/delete, so clients must revalidate:
+    the response carries an ETag and a matching `If-None-Match` gets a 304.
     """
+    # Open the cursor and fetch the first batch before the response starts, so
+    # connection and query errors still return a 500 rather than a cut-off 200.
+    # The session outlives this handler, so it comes from the factory rather
+    # than the get_db dependency (which closes before the body is sent).
+    db = session_factory()
     try:
-        estates = db.query(TeaEstate).all()
+        # Cheap fingerprint of the table; changes on every insert, delete and update
+        count, max_id, last_update = (await db.execute(
+            select(func.count(TeaEstate.id), func.max(TeaEstate.id), func.max(TeaEstate.updated_at))
+        )).one()
+        etag = f'W/"{count}-{max_id or 0}-{last_update.timestamp() if last_update else 0}-{tolerance}"'
+        headers = {"Cache-Control": "private, no-cache", "ETag": etag}
         
-        result = []
-        for estate in estates:
-            # Convert PostGIS geometry back to GeoJSON
-            geom_shape = to_shape(estate.geometry)
-            geom_geojson = mapping(geom_shape)
-            
-            result.append({
-                "id": estate.id,
-                "name": estate.name,
-                "geometry": geom_geojson,
-                "area": estate.total_area_hectares,
-                "created_at": estate.created_at.isoformat() if estate.created_at else None
-            })
+        if_none_match = request.headers.get("if-none-match", "")
+        if etag in (tag.strip() for tag in if_none_match.split(",")):
+            await db.close()
+            return Response(status_code=304, headers=headers)
         
-        print(f"📊 Retrieved {len(result)} estates from database")
-        return result
-    
+        result = await db.stream(
+            _select_estates_json(tolerance).execution_options(yield_per=STREAM_BATCH_SIZE)
+        )
+        estates = result.scalars()
+        first_batch = await estates.fetchmany(STREAM_BATCH_SIZE)
     except Exception as e:
-        print(f"❌ Error retrieving estates: {e}")
+        await db.close()
+        logger.exception("❌ Error fetching estates: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
+    
+    return StreamingResponse(
+        _stream_estates_json(db, estates, first_batch),
+        media_type="application/json",
+        headers=headers,
+        # Runs even if the client disconnects before the body iterator starts
+        background=BackgroundTask(db.close)
+    )
 
 
-@router.get("/estates/{estate_id}", response_model=Dict[str, Any])
-async def get_estate(estate_id: int, db: Session = Depends(get_db)):
+@router.get("/estates/nearby", response_model=List[TeaEstateResponse])
+async def get_nearby_estates(
+    lat: float = Query(..., description="Latitude coordinate", ge=-90, le=90),
+    lon: float = Query(..., description="Longitude coordinate", ge=-180, le=180),
+    radius_km: float = Query(10.0, gt=0, le=500, description="Search radius in kilometres"),
+    tolerance: float = Query(0.0001, ge=0, description="Simplification tolerance in degrees"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get tea estates within `radius_km` of a point.
+    
+    A geometry bounding-box test (`&&`, served by the GiST index) narrows the
+    candidates first; the exact geodesic distance check (ST_DWithin on
+    geography) then runs only on those, all inside PostGIS.
+    """
+    point = func.ST_SetSRID(func.ST_MakePoint(lon, lat), 4326)
+    dlon, dlat = radius_bbox_degrees(lat, radius_km)
+    stmt = _select_estates_geojson(tolerance).where(
+        TeaEstate.geometry.op("&&")(func.ST_Expand(point, dlon, dlat)),
+        func.ST_DWithin(
+            cast(TeaEstate.geometry, Geography),
+            cast(point, Geography),
+            radius_km * 1000
+        )
+    )
+    result = await db.execute(stmt)
+    return [_estate_row_to_dict(row) for row in result]
+
+
+@router.get("/estates/{estate_id}", response_model=TeaEstateResponse)
+async def get_estate(estate_id: int, db: AsyncSession = Depends(get_db)):
     """
     Get a specific tea estate by ID.
     """
-    estate = db.query(TeaEstate).filter(TeaEstate.id == estate_id).first()
+    result = await db.execute(_select_estates_geojson().where(TeaEstate.id == estate_id))
+    row = result.first()
     
-    if not estate:
+    if not row:
         raise HTTPException(status_code=404, detail=f"Estate {estate_id} not found")
     
-    geom_shape = to_shape(estate.geometry)
-    geom_geojson = mapping(geom_shape)
-    
-    return {
-        "id": estate.id,
-        "name": estate.name,
-        "geometry": geom_geojson,
-        "area": estate.total_area_hectares,
-        "created_at": estate.created_at.isoformat() if estate.created_at else None
-    }
+    return _estate_row_to_dict(row)
 
 
 @router.delete("/estates/{estate_id}")
-async def delete_estate(estate_id: int, db: Session = Depends(get_db)):
+async def delete_estate(estate_id: int, db: AsyncSession = Depends(get_db)):
     """
     Delete a tea estate by ID.
     """
-    estate = db.query(TeaEstate).filter(TeaEstate.id == estate_id).first()
+    # Single DELETE ... RETURNING round-trip; no row back means not found
+    result = await db.execute(
+        delete(TeaEstate).where(TeaEstate.id == estate_id).returning(TeaEstate.id)
+    )
     
-    if not estate:
+    if result.first() is None:
         raise HTTPException(status_code=404, detail=f"Estate {estate_id} not found")
     
-    db.delete(estate)
-    db.commit()
+    await db.commit()
     
     return {
         "status": "success",
@@ -4,13 +4,24 @@ Provides endpoints for weather forecasts and disease risk assessment.
 Uses Tomorrow.io API for real-time weather data.
 """
 
-from fastapi import APIRouter, Query, HTTPException
+from fastapi import APIRouter, Body, Query, HTTPException
+from pydantic import BaseModel, Field
+from typing import List
 
-from services.tomorrowio_service import get_weather_risk, RiskAssessment
+from services.tomorrowio_service import get_weather_risk, get_weather_risk_many, RiskAssessment
+from services.cache import async_ttl_cache
+from config import settings
 
 
 router = APIRouter()
 
+# Nearby locations (~1 km grid) share risk results for WEATHER_CACHE_TTL seconds.
+# Fallback assessments (no forecast data) are not cached so the next request retries.
+cached_get_weather_risk = async_ttl_cache(
+    ttl=settings.WEATHER_CACHE_TTL,
+    cache_if=lambda risk: bool(risk.forecast_summary)
+)(get_weather_risk)
+
 
 @router.get("/risk", response_model=RiskAssessment)
 async def get_risk_assessment(
@@ -33,7 +44,33 @@ async def get_risk_assessment(
     **Note:** Data sourced from Tomorrow.io Weather API
     """
     try:
-        return await get_weather_risk(lat, lon)
+        return await cached_get_weather_risk(lat, lon)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to assess weather risk: {str(e)}"
+        )
+
+
+class Coordinate(BaseModel):
+    """Location to assess"""
+    lat: float = Field(..., ge=-90, le=90)
+    lon: float = Field(..., ge=-180, le=180)
+
+
+@router.post("/risk/batch", response_model=List[RiskAssessment])
+async def get_risk_assessments(
+    locations: List[Coordinate] = Body(..., max_length=settings.WEATHER_BATCH_MAX)
+):
+    """
+    Get Blister Blight risk assessments for many locations (e.g. every estate).
+    
+    Locations are assessed concurrently with bounded parallelism; results are
+    returned in request order. Batch size is capped by WEATHER_BATCH_MAX, sized
+    against the Tomorrow.io hourly quota.
+    """
+    try:
+        return await get_weather_risk_many([(loc.lat, loc.lon) for loc in locations])
     except Exception as e:
         raise HTTPException(
             status_code=500,
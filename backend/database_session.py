@@ -3,23 +3,32 @@ Database session management for Ceylon Tea Intelligence Platform.
 Provides dependency injection for database sessions in FastAPI endpoints.
 """
 
-from sqlalchemy.orm import Session
-from database import SessionLocal
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from database import AsyncSessionLocal
 
 
-def get_db():
+def get_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    """
+    Session factory dependency for FastAPI.
+    
+    For endpoints that must keep a session open after the handler returns
+    (e.g. streaming responses), which a yield dependency cannot do. Also
+    backs get_db(), so overriding it swaps the database for every endpoint.
+    """
+    return AsyncSessionLocal
+
+
+async def get_db(session_factory: async_sessionmaker[AsyncSession] = Depends(get_sessionmaker)):
     """
     Database session dependency for FastAPI.
     
     Usage in endpoint:
         @router.get("/example")
-        async def example(db: Session = Depends(get_db)):
+        async def example(db: AsyncSession = Depends(get_db)):
             ...
     
-    Yields database session and ensures proper cleanup.
+    Yields an async database session and ensures proper cleanup.
     """
-    db = SessionLocal()
-    try:
+    async with session_factory() as db:
         yield db
-    finally:
-        db.close()
@@ -3,34 +3,60 @@ Database initialization script for Ceylon Tea Intelligence Platform.
 Run this to create all database tables.
 """
 
+import asyncio
+from sqlalchemy import text
+
 from database import Base, engine, init_db
-from models import TeaLand, TeaEstate, ProductionRecord
+from models import TeaLand, TeaEstate, ProductionRecord, ESTATE_AREA_SQL
+
+# create_all() does not alter existing tables: convert a plain
+# tea_estates.total_area_hectares column into the generated column.
+# Values are recomputed from the geometry, so nothing is lost.
+GENERATED_AREA_MIGRATION = f"""
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'tea_estates'
+          AND column_name = 'total_area_hectares'
+          AND is_generated = 'NEVER'
+    ) THEN
+        ALTER TABLE tea_estates DROP COLUMN total_area_hectares;
+        ALTER TABLE tea_estates ADD COLUMN total_area_hectares double precision
+            GENERATED ALWAYS AS ({ESTATE_AREA_SQL}) STORED;
+    END IF;
+END $$;
+"""
 
-def create_tables():
+async def create_tables():
     """Create all database tables"""
     print("📊 Creating database tables...")
     
     # Import all models to ensure they're registered
     # (already imported above)
     
-    # Create all tables
-    Base.metadata.create_all(bind=engine)
+    # Create all tables (PostGIS must exist before geometry columns/GiST indexes)
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS postgis;"))
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(text(GENERATED_AREA_MIGRATION))
     
     print("✅ Database tables created successfully!")
     print("\nCreated tables:")
-    print("  - tea_lands (with PostGIS geometry)")
-    print("  - tea_estates (with PostGIS geometry)")
+    print("  - tea_lands (with PostGIS geometry + GiST index)")
+    print("  - tea_estates (with PostGIS geometry + GiST index)")
     print("  - production_records")
     
     # Verify PostGIS extension
-    from sqlalchemy import text
-    with engine.connect() as conn:
-        result = conn.execute(text("SELECT PostGIS_version();"))
+    async with engine.connect() as conn:
+        result = await conn.execute(text("SELECT PostGIS_version();"))
         version = result.fetchone()
         if version:
             print(f"\n✅ PostGIS version: {version[0]}")
         else:
             print("\n⚠️  Warning: PostGIS extension not found")
+    
+    await engine.dispose()
 
 if __name__ == "__main__":
-    create_tables()
+    asyncio.run(create_tables())
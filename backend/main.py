@@ -1,20 +1,72 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
+import asyncio
+import logging
 import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
 
 # Import routers (add as you create them)
 from api import tea_lands, weather, alerts
+from services import risk_kernel
+from services.http_client import close_http_clients
+
+def _configure_logging() -> QueueListener:
+    """
+    Single logging configuration for the whole application.
+
+    Records are handed to a queue and written to stderr by a background
+    listener thread, so log I/O never blocks the event loop. Idempotent: if
+    the root logger already has our QueueHandler (module re-imported), its
+    queue is reused. The listener is started and stopped by the lifespan;
+    records logged before startup are written once it starts.
+    """
+    root = logging.getLogger()
+    for handler in root.handlers:
+        if isinstance(handler, QueueHandler):
+            return QueueListener(handler.queue, logging.StreamHandler())
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+        handlers=[QueueHandler(log_queue)]
+    )
+    return QueueListener(log_queue, logging.StreamHandler())
+
+
+log_listener = _configure_logging()
+logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifecycle management for startup and shutdown events"""
-    # Startup
-    print("🚀 Ceylon Tea Intelligence Platform API starting...")
-    print(f"📊 Database URL: {os.getenv('DATABASE_URL', 'Not configured')}")
-    yield
-    # Shutdown
-    print("👋 Shutting down API...")
+    # Startup (the log listener is paired with the stop in `finally`)
+    log_listener.start()
+    try:
+        logger.info("🚀 Ceylon Tea Intelligence Platform API starting...")
+        logger.info("📊 Database URL: %s", os.getenv('DATABASE_URL', 'Not configured'))
+        # Fail fast if a second tea-lands router is registered and shadows the
+        # PostGIS-backed endpoints
+        tea_land_routes = [
+            (route.path, tuple(sorted(route.methods or ())))
+            for route in app.routes
+            if getattr(route, "path", "").startswith("/api/tea-lands")
+        ]
+        assert len(tea_land_routes) == len(set(tea_land_routes)), \
+            "Duplicate routes registered under /api/tea-lands"
+        # Compile the Numba risk kernels now, off the event loop, so no
+        # request pays the JIT cost
+        await asyncio.to_thread(risk_kernel.warm_up)
+        yield
+        # Shutdown: close the shared HTTP clients (created lazily by the services)
+        await close_http_clients()
+        logger.info("👋 Shutting down API...")
+    finally:
+        log_listener.stop()  # Flush queued records
 
 app = FastAPI(
     title="Ceylon Tea Intelligence Platform API",
@@ -22,6 +74,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=ORJSONResponse,  # C-level JSON encoding for large GeoJSON payloads
     lifespan=lifespan
 )
 
@@ -40,6 +93,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Response compression: GeoJSON coordinate arrays compress 5-10x
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # Root endpoint
 @app.get("/")
 async def root():
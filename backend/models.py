@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean
+from sqlalchemy import Column, Computed, Integer, String, Float, DateTime, Boolean, Index
 from sqlalchemy.sql import func
 from geoalchemy2 import Geometry
 from database import Base
@@ -11,6 +11,10 @@ class TeaLand(Base):
     using PostGIS geometry types for efficient geospatial queries.
     """
     __tablename__ = "tea_lands"
+    __table_args__ = (
+        # GiST spatial index for bounding-box lookups (intersects, within, nearby)
+        Index("idx_tea_lands_geom", "geometry", postgresql_using="gist"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False, index=True)
@@ -18,7 +22,8 @@ class TeaLand(Base):
     
     # Geospatial column - stores polygon geometry
     # SRID 4326 is WGS84 (standard GPS coordinates)
-    geometry = Column(Geometry(geometry_type='POLYGON', srid=4326), nullable=False)
+    # (spatial_index=False: the GiST index is declared explicitly in __table_args__)
+    geometry = Column(Geometry(geometry_type='POLYGON', srid=4326, spatial_index=False), nullable=False)
     
     # Area in hectares
     area_hectares = Column(Float, nullable=True)
@@ -38,6 +43,10 @@ class TeaLand(Base):
         return f"<TeaLand(id={self.id}, name='{self.name}', estate='{self.estate_name}')>"
 
 
+# Generated-column expression for TeaEstate.total_area_hectares
+ESTATE_AREA_SQL = "ST_Area(geometry::geography) / 10000"
+
+
 class TeaEstate(Base):
     """
     Tea Estate model representing larger estate boundaries
@@ -46,19 +55,25 @@ class TeaEstate(Base):
     property ownership and management unit.
     """
     __tablename__ = "tea_estates"
+    __table_args__ = (
+        # GiST spatial index for bounding-box lookups (intersects, within, nearby)
+        Index("idx_tea_estates_geom", "geometry", postgresql_using="gist"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False, unique=True, index=True)
     
     # Estate boundary as MultiPolygon (can contain multiple parcels)
-    geometry = Column(Geometry(geometry_type='MULTIPOLYGON', srid=4326), nullable=False)
+    # (spatial_index=False: the GiST index is declared explicitly in __table_args__)
+    geometry = Column(Geometry(geometry_type='MULTIPOLYGON', srid=4326, spatial_index=False), nullable=False)
     
     # Owner information
     owner_name = Column(String, nullable=True)
     registration_number = Column(String, nullable=True, unique=True)
     
-    # Total area in hectares
-    total_area_hectares = Column(Float, nullable=True)
+    # Total area in hectares, computed by PostGIS from the geometry on every
+    # write (geodesic area on the WGS84 spheroid, m² -> ha)
+    total_area_hectares = Column(Float, Computed(ESTATE_AREA_SQL, persisted=True))
     
     # Location information
     district = Column(String, nullable=True, index=True)
@@ -11,17 +11,31 @@ Integrates with Tomorrow.io Events API to provide:
 API Documentation: https://docs.tomorrow.io/reference/events-overview
 """
 
-import httpx
+import asyncio
+import ciso8601
+import ijson
+import logging
 from datetime import datetime
-from typing import List, Dict, Any, Optional
-from pydantic import BaseModel
+from functools import lru_cache
+from typing import List, Dict, Any, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+from pydantic import BaseModel, ConfigDict
 from config import settings
+from services.http_client import get_tomorrowio_client, tomorrowio_rate_limit
+from services.retry import retry_transient
+from services.risk_kernel import landslide_score, landslide_score_batch
+from services.tomorrowio_service import fetch_combined_timeline, timeline_intervals
+
+
+logger = logging.getLogger(__name__)
 
 
 # ===== Data Models =====
 
 class DisasterAlert(BaseModel):
     """Disaster alert model"""
+    model_config = ConfigDict(frozen=True)
+    
     id: str
     type: str  # flood, heavy_rain, landslide, drought, cyclone, wind
     severity: str  # advisory, watch, warning, critical
@@ -38,23 +52,29 @@ class DisasterAlert(BaseModel):
 
 # ===== Tomorrow.io Events API =====
 
+@retry_transient
 async def fetch_tomorrowio_events(
     lat: float,
     lon: float,
-    buffer_km: int = 100
-) -> Dict[str, Any]:
+    buffer_km: int = 100,
+    max_events: Optional[int] = None
+) -> List[Dict[str, Any]]:
     """
     Fetch disaster events from Tomorrow.io Events API.
     
+    The response body is streamed through an incremental JSON parser, so
+    events are decoded as their bytes arrive and the download stops as soon
+    as `max_events` events have been collected.
+    
     Args:
         lat: Center latitude
         lon: Center longitude
         buffer_km: Radius to search for events (km)
+        max_events: Stop after this many events (None reads the whole response)
         
     Returns:
-        Raw JSON response with active events
+        List of raw event objects (the response's data.events array)
     """
-    url = f"{settings.TOMORROWIO_BASE_URL}/events"
     params = {
         "apikey": settings.TOMORROWIO_API_KEY,
         "location": f"{lat},{lon}",
@@ -62,139 +82,162 @@ async def fetch_tomorrowio_events(
         "insights": "tropical,flood,wind,winter,temperature,other"
     }
     
-    async with httpx.AsyncClient(timeout=20.0) as client:
-        response = await client.get(url, params=params)
-        response.raise_for_status()
-        return response.json()
+    events: List[Dict[str, Any]] = []
+    parsed = ijson.sendable_list()
+    parser = ijson.items_coro(parsed, "data.events.item", use_float=True)
+    
+    client = get_tomorrowio_client()
+    async with tomorrowio_rate_limit():
+        async with client.stream("GET", "/events", params=params, timeout=20.0) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes():
+                parser.send(chunk)
+                events.extend(parsed)
+                del parsed[:]
+                if max_events is not None and len(events) >= max_events:
+                    return events[:max_events]  # Leaving the block drops the rest
+    
+    parser.close()
+    events.extend(parsed)
+    return events
 
 
-async def fetch_flood_risk(lat: float, lon: float) -> Dict[str, Any]:
+# ===== Alert Mapping Functions =====
+
+@lru_cache(maxsize=2048)
+def _parse_iso(timestamp: Optional[str]) -> Optional[datetime]:
     """
-    Get 5-day flood risk prediction from Tomorrow.io.
+    Parse an ISO 8601 timestamp from Tomorrow.io (trailing 'Z' included).
     
-    Uses Flood Risk Index field from timeline API.
+    Uses the ciso8601 C parser; identical timestamps shared across events
+    are served from the cache. Returns None for missing values.
     """
-    url = f"{settings.TOMORROWIO_BASE_URL}/timelines"
-    params = {
-        "apikey": settings.TOMORROWIO_API_KEY,
-        "location": f"{lat},{lon}",
-        "fields": "floodRiskIndex,precipitationIntensity,precipitationAccumulation",
-        "timesteps": "1d",
-        "units": "metric"
-    }
-    
-    async with httpx.AsyncClient(timeout=15.0) as client:
-        response = await client.get(url, params=params)
-        response.raise_for_status()
-        return response.json()
+    if not timestamp:
+        return None
+    return ciso8601.parse_datetime(timestamp)
 
 
-# ===== Alert Mapping Functions =====
+# Tomorrow.io insight type -> our disaster type
+_EVENT_TYPES: Dict[str, str] = {
+    'flood': 'flood',
+    'tropical': 'cyclone',
+    'wind': 'wind',
+    'winter': 'temperature',
+    'temperature': 'temperature',
+    'thunderstorm': 'heavy_rain',
+    'other': 'heavy_rain'
+}
+
+# Tomorrow.io severity -> our classification
+_SEVERITIES: Dict[str, str] = {
+    'minor': 'advisory',
+    'moderate': 'watch',
+    'severe': 'warning',
+    'extreme': 'critical'
+}
+
+# Recommendation lists per alert type (and severity), built once at import
+_FLOOD_CRIT_RECS = (
+    "Move tea processing equipment to higher ground immediately",
+    "Clear all drainage channels and culverts",
+    "Harvest mature tea leaves if possible within next 6 hours",
+    "Prepare sandbags for estate buildings and storage",
+    "Evacuate workers from low-lying areas",
+    "Monitor river levels every hour"
+)
+_FLOOD_RECS = (
+    "Check drainage systems are clear",
+    "Identify safe evacuation routes",
+    "Stock emergency supplies (fuel, food, medical)",
+    "Move valuable equipment to elevated storage"
+)
+_CYCLONE_CRIT_RECS = (
+    "Secure all loose structures and equipment NOW",
+    "Emergency harvest of tea if within 12h of storm",
+    "Board up windows on estate buildings",
+    "Evacuate workers to designated safe zones",
+    "Stock 7 days of emergency supplies",
+    "Monitor official weather updates every 2 hours"
+)
+_CYCLONE_RECS = (
+    "Prepare emergency kits and supplies",
+    "Identify cyclone shelter locations",
+    "Secure outdoor equipment",
+    "Review evacuation procedures with staff"
+)
+_HEAVY_RAIN_RECS = (
+    "Delay all field operations during heavy rain",
+    "Protect workers from lightning (move indoors)",
+    "Cover harvested tea leaves to prevent damage",
+    "Check for waterlogging and ponding after storm",
+    "Inspect tea bushes for physical damage"
+)
+_LANDSLIDE_CRIT_RECS = (
+    "EVACUATE workers from slope areas immediately",
+    "Stay away from hillside tea estates",
+    "Monitor for ground cracks, tilted trees, unusual sounds",
+    "Do not attempt to harvest on slopes during/after heavy rain",
+    "Contact local authorities for geological assessment"
+)
+_LANDSLIDE_RECS = (
+    "Monitor slope stability indicators",
+    "Avoid unnecessary access to steep areas",
+    "Report any ground movement to authorities"
+)
+_DROUGHT_RECS = (
+    "Increase irrigation frequency immediately",
+    "Apply mulch to retain soil moisture",
+    "Monitor tea bush stress indicators (leaf curl, yellowing)",
+    "Reduce plucking intensity to conserve plant energy",
+    "Check irrigation system functionality daily"
+)
+_DEFAULT_RECS = ("Monitor weather conditions closely and follow official advisories",)
+
+_URGENT_SEVERITIES = frozenset(('critical', 'warning'))
+
 
 def map_event_type(tomorrow_insight: str) -> str:
     """Map Tomorrow.io insight type to our disaster types"""
-    mapping = {
-        'flood': 'flood',
-        'tropical': 'cyclone',
-        'wind': 'wind',
-        'winter': 'temperature',
-        'temperature': 'temperature',
-        'thunderstorm': 'heavy_rain',
-        'other': 'heavy_rain'
-    }
-    return mapping.get(tomorrow_insight.lower(), 'heavy_rain')
+    return _EVENT_TYPES.get(tomorrow_insight.lower(), 'heavy_rain')
 
 
 def map_severity(tomorrow_severity: str) -> str:
     """Map Tomorrow.io severity to our classification"""
-    mapping = {
-        'minor': 'advisory',
-        'moderate': 'watch',
-        'severe': 'warning',
-        'extreme': 'critical'
-    }
-    return mapping.get(tomorrow_severity.lower(), 'advisory')
+    return _SEVERITIES.get(tomorrow_severity.lower(), 'advisory')
 
 
-def generate_recommendations(alert_type: str, severity: str) -> List[str]:
+def generate_recommendations(alert_type: str, severity: str) -> Tuple[str, ...]:
     """Generate actionable recommendations based on alert type"""
+    urgent = severity in _URGENT_SEVERITIES
     
     if alert_type == 'flood':
-        if severity in ['critical', 'warning']:
-            return [
-                "Move tea processing equipment to higher ground immediately",
-                "Clear all drainage channels and culverts",
-                "Harvest mature tea leaves if possible within next 6 hours",
-                "Prepare sandbags for estate buildings and storage",
-                "Evacuate workers from low-lying areas",
-                "Monitor river levels every hour"
-            ]
-        else:
-            return [
-                "Check drainage systems are clear",
-                "Identify safe evacuation routes",
-                "Stock emergency supplies (fuel, food, medical)",
-                "Move valuable equipment to elevated storage"
-            ]
-    
+        return _FLOOD_CRIT_RECS if urgent else _FLOOD_RECS
     elif alert_type == 'cyclone':
-        if severity in ['critical', 'warning']:
-            return [
-                "Secure all loose structures and equipment NOW",
-                "Emergency harvest of tea if within 12h of storm",
-                "Board up windows on estate buildings",
-                "Evacuate workers to designated safe zones",
-                "Stock 7 days of emergency supplies",
-                "Monitor official weather updates every 2 hours"
-            ]
-        else:
-            return [
-                "Prepare emergency kits and supplies",
-                "Identify cyclone shelter locations",
-                "Secure outdoor equipment",
-                "Review evacuation procedures with staff"
-            ]
-    
+        return _CYCLONE_CRIT_RECS if urgent else _CYCLONE_RECS
     elif alert_type == 'heavy_rain':
-        return [
-            "Delay all field operations during heavy rain",
-            "Protect workers from lightning (move indoors)",
-            "Cover harvested tea leaves to prevent damage",
-            "Check for waterlogging and ponding after storm",
-            "Inspect tea bushes for physical damage"
-        ]
-    
+        return _HEAVY_RAIN_RECS
     elif alert_type == 'landslide':
-        if severity in ['critical', 'warning']:
-            return [
-                "EVACUATE workers from slope areas immediately",
-                "Stay away from hillside tea estates",
-                "Monitor for ground cracks, tilted trees, unusual sounds",
-                "Do not attempt to harvest on slopes during/after heavy rain",
-                "Contact local authorities for geological assessment"
-            ]
-        else:
-            return [
-                "Monitor slope stability indicators",
-                "Avoid unnecessary access to steep areas",
-                "Report any ground movement to authorities"
-            ]
-    
+        return _LANDSLIDE_CRIT_RECS if urgent else _LANDSLIDE_RECS
     elif alert_type == 'drought':
-        return [
-            "Increase irrigation frequency immediately",
-            "Apply mulch to retain soil moisture",
-            "Monitor tea bush stress indicators (leaf curl, yellowing)",
-            "Reduce plucking intensity to conserve plant energy",
-            "Check irrigation system functionality daily"
-        ]
-    
+        return _DROUGHT_RECS
     else:
-        return ["Monitor weather conditions closely and follow official advisories"]
+        return _DEFAULT_RECS
 
 
 # ===== Landslide Risk Calculation =====
 
+def _landslide_severity(risk_score: int) -> str:
+    """Classify a landslide risk score into an alert severity"""
+    if risk_score >= 70:
+        return 'critical'
+    elif risk_score >= 50:
+        return 'warning'
+    elif risk_score >= 30:
+        return 'watch'
+    else:
+        return 'advisory'
+
+
 def calculate_landslide_risk(
     precipitation_mm: float,
     precipitation_3day: float,
@@ -204,6 +247,8 @@ def calculate_landslide_risk(
     """
     Calculate landslide risk from weather data.
     
+    Scoring runs in the compiled kernel from services.risk_kernel.
+    
     Args:
         precipitation_mm: Recent precipitation intensity (mm/hr)
         precipitation_3day: 3-day cumulative precipitation (mm)
@@ -213,48 +258,50 @@ def calculate_landslide_risk(
     Returns:
         (severity, risk_score)
     """
-    risk_score = 0
-    
-    # Heavy sustained rainfall
-    if precipitation_3day > 200:
-        risk_score += 40
-    elif precipitation_3day > 100:
-        risk_score += 25
-    elif precipitation_3day > 50:
-        risk_score += 10
-    
-    # Intense precipitation rate
-    if precipitation_mm > 50:
-        risk_score += 30
-    elif precipitation_mm > 25:
-        risk_score += 15
-    
-    # Saturated soil
-    if soil_moisture > 0.8:
-        risk_score += 20
-    elif soil_moisture > 0.6:
-        risk_score += 10
+    risk_score = int(landslide_score(
+        float(precipitation_mm), float(precipitation_3day), float(soil_moisture), float(slope_degrees)
+    ))
+    return _landslide_severity(risk_score), risk_score
+
+
+def calculate_landslide_risk_batch(
+    precipitation_mm: Sequence[float],
+    precipitation_3day: Sequence[float],
+    soil_moisture: Sequence[float],
+    slope_degrees: Sequence[float]
+) -> List[tuple[str, int]]:
+    """
+    Calculate landslide risk for many estates at once.
     
-    # Steep slopes (tea estates often on hillsides in Sri Lanka)
-    if slope_degrees > 30:
-        risk_score += 10
-    elif slope_degrees > 20:
-        risk_score += 5
+    Each argument holds one value per estate; scores are computed in parallel
+    by the compiled batch kernel.
     
-    # Classify severity
-    if risk_score >= 70:
-        return 'critical', risk_score
-    elif risk_score >= 50:
-        return 'warning', risk_score
-    elif risk_score >= 30:
-        return 'watch', risk_score
-    else:
-        return 'advisory', risk_score
+    Returns:
+        List of (severity, risk_score), one per estate
+    """
+    scores = landslide_score_batch(
+        np.asarray(precipitation_mm, dtype=np.float64),
+        np.asarray(precipitation_3day, dtype=np.float64),
+        np.asarray(soil_moisture, dtype=np.float64),
+        np.asarray(slope_degrees, dtype=np.float64)
+    )
+    return [(_landslide_severity(int(score)), int(score)) for score in scores]
 
 
 # ===== Main Alert Service =====
 
-async def get_active_alerts(lat: float, lon: float) -> List[DisasterAlert]:
+
+class AlertReport(NamedTuple):
+    """Alerts for a location, flagged as degraded if an upstream source failed."""
+    alerts: List[DisasterAlert]
+    degraded: bool
+
+
+async def get_alert_report(
+    lat: float,
+    lon: float,
+    max_alerts: int = 20
+) -> AlertReport:
     """
     Get all active disaster alerts for a location.
     
@@ -262,72 +309,112 @@ async def get_active_alerts(lat: float, lon: float) -> List[DisasterAlert]:
     - Tomorrow.io Events API (official governmental alerts)
     - Custom risk calculations (landslide, flood risk index)
     
+    A failing source is logged and skipped so the other source's alerts are
+    still returned; the report is then marked degraded so callers can avoid
+    caching the partial result.
+    
     Args:
         lat: Latitude coordinate
         lon: Longitude coordinate  
+        max_alerts: Maximum number of alerts returned
         
     Returns:
-        List of active DisasterAlert objects
+        AlertReport with the active DisasterAlert objects
     """
     alerts = []
+    degraded = False
+    
+    # Both upstream calls are independent: issue them concurrently. With
+    # return_exceptions=True a failure in one does not cancel the other.
+    events_result, flood_result = await asyncio.gather(
+        fetch_tomorrowio_events(lat, lon, max_events=max_alerts),
+        fetch_combined_timeline(lat, lon),
+        return_exceptions=True
+    )
     
     try:
-        # Fetch Tomorrow.io events
-        events_data = await fetch_tomorrowio_events(lat, lon)
+        # Process Tomorrow.io events
+        if isinstance(events_result, BaseException):
+            raise events_result
         
-        for event in events_data.get('data', {}).get('events', []):
-            alert_type = map_event_type(event.get('insight', ''))
-            severity = map_severity(event.get('severity', ''))
+        for event in events_result:
+            get = event.get
+            alert_type = map_event_type(str(get('insight') or ''))
+            severity = map_severity(str(get('severity') or ''))
+            event_id = get('eventId')
+            if event_id is None:  # Only build the fallback id when needed
+                event_id = f"evt_{datetime.now().timestamp()}"
             
-            alert = DisasterAlert(
-                id=event.get('eventId', f"evt_{datetime.now().timestamp()}"),
+            # Upstream fields are coerced to the declared types here (nulls get
+            # the defaults), so the alert can skip re-validation
+            alert = DisasterAlert.model_construct(
+                id=str(event_id),
                 type=alert_type,
                 severity=severity,
-                title=event.get('title', 'Weather Alert'),
-                description=event.get('description', 'No description available'),
-                affected_regions=[event.get('location', {}).get('name', 'Unknown')],
-                start_time=datetime.fromisoformat(event.get('startTime', datetime.now().isoformat()).replace('Z', '+00:00')),
-                end_time=datetime.fromisoformat(event.get('endTime', '').replace('Z', '+00:00')) if event.get('endTime') else None,
+                title=str(get('title') or 'Weather Alert'),
+                description=str(get('description') or 'No description available'),
+                affected_regions=[str((get('location') or {}).get('name') or 'Unknown')],
+                start_time=_parse_iso(get('startTime')) or datetime.now(),
+                end_time=_parse_iso(get('endTime')),
                 coordinates=(lat, lon),
-                radius=100,  # Default radius
+                radius=100.0,  # Default radius
                 source='tomorrowio',
-                recommendations=generate_recommendations(alert_type, severity)
+                recommendations=list(generate_recommendations(alert_type, severity))
             )
             alerts.append(alert)
     
     except Exception as e:
-        print(f"Error fetching Tomorrow.io events: {e}")
+        degraded = True
+        logger.exception("Error fetching Tomorrow.io events: %s", e)
+    
+    if len(alerts) >= max_alerts:
+        return AlertReport(alerts, degraded)
     
     # Add flood risk prediction
     try:
-        flood_data = await fetch_flood_risk(lat, lon)
-        timelines = flood_data.get('data', {}).get('timelines', [])
+        if isinstance(flood_result, BaseException):
+            raise flood_result
+        # Daily slice of the timeline shared with the weather risk endpoint
+        intervals = timeline_intervals(flood_result, "1d")
         
-        if timelines:
-            intervals = timelines[0].get('intervals', [])
+        if intervals:
             # Check if any day has high flood risk
             for interval in intervals[:5]:  # 5-day forecast
-                flood_index = interval.get('values', {}).get('floodRiskIndex', 0)
+                flood_index = (interval.get('values') or {}).get('floodRiskIndex', 0)
                 
                 if flood_index > 70:  # High flood risk
-                    alert = DisasterAlert(
+                    alert = DisasterAlert.model_construct(
                         id=f"flood_{datetime.now().timestamp()}",
                         type='flood',
                         severity='warning' if flood_index > 85 else 'watch',
                         title=f"Flood Risk Alert - Index {flood_index}%",
                         description=f"High flood risk predicted. Risk index: {flood_index}/100. Based on precipitation forecasts and hydrologic modeling.",
                         affected_regions=['Local Area'],
-                        start_time=datetime.fromisoformat(interval.get('startTime', '').replace('Z', '+00:00')),
+                        start_time=_parse_iso(interval.get('startTime')) or datetime.now(),
                         end_time=None,
                         coordinates=(lat, lon),
-                        radius=50,
+                        radius=50.0,
                         source='tomorrowio',
-                        recommendations=generate_recommendations('flood', 'warning' if flood_index > 85 else 'watch')
+                        recommendations=list(generate_recommendations('flood', 'warning' if flood_index > 85 else 'watch'))
                     )
                     alerts.append(alert)
                     break  # Only add one flood alert
     
     except Exception as e:
-        print(f"Error fetching flood risk: {e}")
+        degraded = True
+        logger.exception("Error fetching flood risk: %s", e)
     
-    return alerts
+    return AlertReport(alerts, degraded)
+
+
+async def get_active_alerts(
+    lat: float,
+    lon: float,
+    max_alerts: int = 20
+) -> List[DisasterAlert]:
+    """
+    Get all active disaster alerts for a location.
+    
+    Same as get_alert_report(), without the degraded flag.
+    """
+    return (await get_alert_report(lat, lon, max_alerts)).alerts
@@ -0,0 +1,82 @@
+"""
+Async caching helpers for Ceylon Tea Intelligence Platform.
+
+Provides an in-process TTL cache for coroutine functions whose result depends
+on a (lat, lon) location. Coordinates are rounded to 2 decimals (~1.1 km grid)
+so nearby estates share a cache entry, and concurrent misses for the same key
+are coalesced into a single upstream call (stampede protection).
+"""
+
+import asyncio
+import functools
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+
+def coord_key(lat: float, lon: float, *args: Any, **kwargs: Any) -> Hashable:
+    """Build a cache key from coordinates rounded to a ~1 km grid."""
+    return (round(lat, 2), round(lon, 2), args, tuple(sorted(kwargs.items())))
+
+
+def async_ttl_cache(
+    ttl: float,
+    maxsize: int = 1024,
+    key: Callable[..., Hashable] = coord_key,
+    cache_if: Optional[Callable[[Any], bool]] = None
+) -> Callable[[Callable[..., Awaitable[Any]]], Callable[..., Awaitable[Any]]]:
+    """
+    Cache results of an async function for `ttl` seconds.
+
+    Args:
+        ttl: Time-to-live of a cached result in seconds
+        maxsize: Maximum number of entries (least recently used are evicted)
+        key: Builds the cache key from the call arguments
+        cache_if: Optional predicate; results for which it returns False
+            (e.g. degraded fallbacks) are returned but not cached
+
+    Returns:
+        Decorator producing a cached coroutine function with a `cache_clear()` helper
+    """
+    def decorator(func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        cache: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        in_flight: dict[Hashable, asyncio.Task] = {}
+
+        async def fill(k: Hashable, args: tuple, kwargs: dict) -> Any:
+            """Fetch and cache one key; runs as its own task shared by all waiters."""
+            try:
+                value = await func(*args, **kwargs)
+                if cache_if is None or cache_if(value):
+                    cache[k] = (time.monotonic() + ttl, value)
+                    cache.move_to_end(k)
+                    while len(cache) > maxsize:
+                        cache.popitem(last=False)
+                return value
+            finally:
+                in_flight.pop(k, None)
+
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            k = key(*args, **kwargs)
+
+            entry = cache.get(k)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    cache.move_to_end(k)
+                    return entry[1]
+                del cache[k]
+
+            # The upstream call runs in its own task, so cancelling any one
+            # caller (including the first) does not cancel it for the others
+            task = in_flight.get(k)
+            if task is None:
+                task = asyncio.get_running_loop().create_task(fill(k, args, kwargs))
+                # Mark the exception retrieved even if every caller went away
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+                in_flight[k] = task
+            return await asyncio.shield(task)
+
+        wrapper.cache_clear = cache.clear  # type: ignore[attr-defined]
+        return wrapper
+
+    return decorator
@@ -0,0 +1,85 @@
+"""
+Geospatial math helpers for Ceylon Tea Intelligence Platform.
+
+Vectorized great-circle distance calculations using NumPy broadcasting, for
+bulk "estates near point" filtering on in-memory coordinate arrays. Queries
+against stored estates should prefer PostGIS: a geometry bounding-box test
+(see `radius_bbox_degrees`) that can use the GiST index, followed by
+ST_DWithin on geography for the exact distance.
+"""
+
+import math
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+# Mean Earth radius in kilometres
+EARTH_RADIUS_KM = 6371.0
+
+# Shortest length of one degree of latitude / longest of one degree of
+# longitude at the equator (WGS84), in km; used for conservative boxes
+KM_PER_DEG_LAT_MIN = 110.574
+KM_PER_DEG_LON_EQUATOR = 111.320
+
+
+def haversine_matrix(
+    lat1: ArrayLike,
+    lon1: ArrayLike,
+    lat2: ArrayLike,
+    lon2: ArrayLike
+) -> np.ndarray:
+    """
+    Pairwise Haversine distances between two sets of points.
+
+    Args:
+        lat1, lon1: Coordinates (degrees) of the first set, shape (n,)
+        lat2, lon2: Coordinates (degrees) of the second set, shape (m,)
+
+    Returns:
+        Distance matrix in kilometres, shape (n, m)
+    """
+    lat1, lon1, lat2, lon2 = (
+        np.deg2rad(np.atleast_1d(np.asarray(a, dtype=np.float64)))
+        for a in (lat1, lon1, lat2, lon2)
+    )
+
+    dlat = lat2 - lat1[:, None]
+    dlon = lon2 - lon1[:, None]
+
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1[:, None]) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def within_radius(
+    lat: float,
+    lon: float,
+    lats: ArrayLike,
+    lons: ArrayLike,
+    radius_km: float
+) -> np.ndarray:
+    """
+    Indices of the points (lats, lons) lying within `radius_km` of (lat, lon).
+    """
+    distances = haversine_matrix(lat, lon, lats, lons)[0]
+    return np.flatnonzero(distances <= radius_km)
+
+
+def radius_bbox_degrees(lat: float, radius_km: float) -> tuple[float, float]:
+    """
+    Half-width and half-height (degrees) of a box around latitude `lat` that
+    contains every point within `radius_km`.
+
+    The box is deliberately conservative (it over-covers), so it can serve as
+    an index-friendly prefilter in front of an exact distance test. Boxes
+    crossing the antimeridian are not split.
+
+    Returns:
+        (dlon, dlat) in degrees
+    """
+    dlat = radius_km / KM_PER_DEG_LAT_MIN
+    # Longitude degrees are shortest at the box edge nearest the pole
+    edge_lat = min(abs(lat) + dlat, 90.0)
+    cos_edge = math.cos(math.radians(edge_lat))
+    if cos_edge < 1e-6:
+        return 180.0, dlat
+    return min(radius_km / (KM_PER_DEG_LON_EQUATOR * cos_edge), 180.0), dlat
@@ -0,0 +1,97 @@
+"""
+Shared HTTP clients for Ceylon Tea Intelligence Platform.
+
+All outbound calls to weather providers reuse pooled `httpx.AsyncClient`
+instances, so TCP/TLS connections are kept alive across requests instead of
+being re-established per call:
+
+- `get_tomorrowio_client()`: bound to TOMORROWIO_BASE_URL, used with relative
+  paths (e.g. "/timelines") by every Tomorrow.io fetcher
+- `get_http_client()`: general-purpose client for other providers (Meteosource)
+
+Clients are created lazily on first use and closed by the FastAPI lifespan on
+shutdown via `close_http_clients()`.
+
+Tomorrow.io calls must also go through `tomorrowio_rate_limit()`, which shapes
+bursts to the API key's quota instead of provoking 429 responses. Once the
+quota is used up it raises `RateLimitExceeded` rather than queueing callers
+until capacity returns.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+import httpx
+from aiolimiter import AsyncLimiter
+
+from config import settings
+
+
+# HTTP/2 lets concurrent requests to the same host multiplex over a single
+# TLS connection; keep-alive limits bound the number of open sockets.
+_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=100)
+
+_client: Optional[httpx.AsyncClient] = None
+_tomorrowio_client: Optional[httpx.AsyncClient] = None
+
+# Leaky-bucket limiters matching the Tomorrow.io plan (see config.py)
+_tomorrowio_per_second = AsyncLimiter(settings.TOMORROWIO_RPS, time_period=1.0)
+_tomorrowio_per_hour = AsyncLimiter(settings.TOMORROWIO_RPH, time_period=3600)
+
+# Longest (seconds) a call may wait for rate-limit capacity before failing
+MAX_RATE_LIMIT_WAIT = 2.0
+
+
+class RateLimitExceeded(httpx.HTTPError):
+    """Tomorrow.io quota is exhausted; the request was not sent."""
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared general-purpose AsyncClient, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(http2=True, timeout=httpx.Timeout(15.0), limits=_LIMITS)
+    return _client
+
+
+def get_tomorrowio_client() -> httpx.AsyncClient:
+    """Return the shared Tomorrow.io AsyncClient, creating it on first use."""
+    global _tomorrowio_client
+    if _tomorrowio_client is None or _tomorrowio_client.is_closed:
+        _tomorrowio_client = httpx.AsyncClient(
+            base_url=settings.TOMORROWIO_BASE_URL,
+            http2=True,
+            timeout=httpx.Timeout(15.0),
+            limits=_LIMITS
+        )
+    return _tomorrowio_client
+
+
+@asynccontextmanager
+async def tomorrowio_rate_limit() -> AsyncIterator[None]:
+    """
+    Wait for capacity under the Tomorrow.io per-second and per-hour quotas.
+    
+    Raises RateLimitExceeded immediately when the hourly quota is used up,
+    or after MAX_RATE_LIMIT_WAIT seconds without capacity.
+    """
+    if not _tomorrowio_per_hour.has_capacity():
+        raise RateLimitExceeded("Tomorrow.io hourly request quota exhausted")
+    try:
+        async with asyncio.timeout(MAX_RATE_LIMIT_WAIT):
+            await _tomorrowio_per_second.acquire()
+            await _tomorrowio_per_hour.acquire()
+    except TimeoutError:
+        raise RateLimitExceeded("Timed out waiting for Tomorrow.io rate limit") from None
+    yield
+
+
+async def close_http_clients() -> None:
+    """Close all shared AsyncClients (called on application shutdown)."""
+    global _client, _tomorrowio_client
+    for client in (_client, _tomorrowio_client):
+        if client is not None:
+            await client.aclose()
+    _client = None
+    _tomorrowio_client = None
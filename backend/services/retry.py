@@ -0,0 +1,59 @@
+"""
+Retry policy for outbound weather API calls.
+
+Transient failures (connection errors, HTTP 429 and 5xx) are retried with
+exponential backoff and jitter; other 4xx client errors fail immediately so
+bad requests (e.g. invalid coordinates) do not wait through retries.
+A `Retry-After` header on the failed response takes precedence over backoff.
+"""
+
+import httpx
+from tenacity import (
+    retry,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_exponential_jitter,
+)
+from tenacity.wait import wait_base
+
+
+# Longest Retry-After (seconds) we are willing to sleep inside a request
+MAX_RETRY_AFTER = 5.0
+
+
+def is_transient_http_error(exc: BaseException) -> bool:
+    """True for errors worth retrying: transport failures, HTTP 429 and 5xx."""
+    if isinstance(exc, httpx.TransportError):
+        return True
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        return status == 429 or status >= 500
+    return False
+
+
+class wait_retry_after(wait_base):
+    """Honor the server's Retry-After header, otherwise defer to `fallback`."""
+
+    def __init__(self, fallback: wait_base, max_wait: float = MAX_RETRY_AFTER):
+        self.fallback = fallback
+        self.max_wait = max_wait
+
+    def __call__(self, retry_state) -> float:
+        exc = retry_state.outcome.exception() if retry_state.outcome else None
+        if isinstance(exc, httpx.HTTPStatusError):
+            retry_after = exc.response.headers.get("Retry-After")
+            if retry_after:
+                try:
+                    return min(max(float(retry_after), 0.0), self.max_wait)
+                except ValueError:
+                    pass  # HTTP-date form; fall back to backoff
+        return self.fallback(retry_state)
+
+
+# Decorator for provider fetchers: 3 attempts, 0.2s -> 2s jittered backoff
+retry_transient = retry(
+    retry=retry_if_exception(is_transient_http_error),
+    stop=stop_after_attempt(3),
+    wait=wait_retry_after(wait_exponential_jitter(initial=0.2, max=2.0)),
+    reraise=True,
+)
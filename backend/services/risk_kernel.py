@@ -0,0 +1,172 @@
+"""
+Numeric risk-scoring kernels for Ceylon Tea Intelligence Platform.
+
+Pure numeric cores of the landslide and Blister Blight risk algorithms,
+operating on NumPy arrays so they can be JIT-compiled with Numba and applied
+to many estates at once. Service modules (tomorrowio_service,
+weather_service) keep thin adapters that extract arrays from their
+provider-specific payloads and format the results.
+
+Numba is optional: if it cannot be imported, the kernels run as plain Python
+with identical results.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:  # pragma: no cover - depends on the environment
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit when Numba is not installed."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+# ===== Blister Blight =====
+
+# A day favours Blister Blight when humidity > 90% AND temperature < 25°C
+BLISTER_HUMIDITY_MIN = 90.0
+BLISTER_TEMPERATURE_MAX = 25.0
+
+# Number of days included in a risk assessment's forecast_summary (shown in the UI)
+SUMMARY_DAYS = 3
+
+
+@njit(cache=True)
+def _blister_streak_loop(humidity: np.ndarray, temperature: np.ndarray):
+    """Single-pass streak scan; compiled to native code by Numba."""
+    n = humidity.shape[0]
+    risk_flags = np.zeros(n, dtype=np.bool_)
+    current = 0
+    max_streak = 0
+    start_idx = -1
+    end_idx = -1
+
+    for i in range(n):
+        if humidity[i] > BLISTER_HUMIDITY_MIN and temperature[i] < BLISTER_TEMPERATURE_MAX:
+            risk_flags[i] = True
+            current += 1
+            if current > max_streak:
+                max_streak = current
+                end_idx = i
+                start_idx = i - current + 1
+        else:
+            current = 0
+
+    return max_streak, start_idx, end_idx, risk_flags
+
+
+def _blister_streak_numpy(humidity: np.ndarray, temperature: np.ndarray):
+    """Vectorized streak scan with NumPy boolean ops (used without Numba)."""
+    risk_flags = (humidity > BLISTER_HUMIDITY_MIN) & (temperature < BLISTER_TEMPERATURE_MAX)
+    if not risk_flags.any():
+        return 0, -1, -1, risk_flags
+
+    # Run boundaries: +1 where a streak starts, -1 just past where it ends
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], risk_flags.view(np.int8), [0]))))
+    starts, stops = edges[::2], edges[1::2]
+    lengths = stops - starts
+    longest = int(lengths.argmax())  # First (earliest) longest streak
+    return int(lengths[longest]), int(starts[longest]), int(stops[longest]) - 1, risk_flags
+
+
+def blister_streak(humidity: np.ndarray, temperature: np.ndarray):
+    """
+    Find the longest run of consecutive Blister Blight risk days.
+
+    Args:
+        humidity: Daily humidity (%), float64 array
+        temperature: Daily temperature (°C), float64 array of the same length
+
+    Returns:
+        (max_streak, start_idx, end_idx, risk_flags) where start/end index the
+        earliest longest streak (-1 when there is none) and risk_flags marks
+        every risk day
+    """
+    if NUMBA_AVAILABLE:
+        return _blister_streak_loop(humidity, temperature)
+    return _blister_streak_numpy(humidity, temperature)
+
+
+# ===== Landslide =====
+
+@njit(cache=True)
+def landslide_score(
+    precipitation_mm: float,
+    precipitation_3day: float,
+    soil_moisture: float,
+    slope_degrees: float
+) -> int:
+    """Landslide risk score (0-100) for a single location."""
+    score = 0
+
+    # Heavy sustained rainfall
+    if precipitation_3day > 200:
+        score += 40
+    elif precipitation_3day > 100:
+        score += 25
+    elif precipitation_3day > 50:
+        score += 10
+
+    # Intense precipitation rate
+    if precipitation_mm > 50:
+        score += 30
+    elif precipitation_mm > 25:
+        score += 15
+
+    # Saturated soil
+    if soil_moisture > 0.8:
+        score += 20
+    elif soil_moisture > 0.6:
+        score += 10
+
+    # Steep slopes (tea estates often on hillsides in Sri Lanka)
+    if slope_degrees > 30:
+        score += 10
+    elif slope_degrees > 20:
+        score += 5
+
+    return score
+
+
+@njit(cache=True, parallel=True)
+def landslide_score_batch(
+    precipitation_mm: np.ndarray,
+    precipitation_3day: np.ndarray,
+    soil_moisture: np.ndarray,
+    slope_degrees: np.ndarray
+) -> np.ndarray:
+    """Landslide risk scores for many locations at once (parallel over estates)."""
+    n = precipitation_mm.shape[0]
+    scores = np.empty(n, dtype=np.int32)
+    for i in prange(n):
+        scores[i] = landslide_score(
+            precipitation_mm[i], precipitation_3day[i], soil_moisture[i], slope_degrees[i]
+        )
+    return scores
+
+
+# ===== Warm-up =====
+
+def warm_up() -> None:
+    """
+    Compile the kernels used on request paths ahead of the first request.
+
+    Numba compiles on first call (about 0.4 s with an empty cache), which would
+    otherwise block the event loop inside a request. Call once at startup,
+    off the loop (e.g. via asyncio.to_thread).
+
+    landslide_score_batch is left to compile on first use: no endpoint calls
+    it, and compiling a parallel kernel from a worker thread starts Numba's
+    thread pool there, which hangs interpreter exit with the TBB layer.
+    """
+    if not NUMBA_AVAILABLE:
+        return
+    one = np.zeros(1, dtype=np.float64)
+    blister_streak(one, one)
+    landslide_score(0.0, 0.0, 0.0, 0.0)
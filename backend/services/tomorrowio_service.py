@@ -10,17 +10,26 @@ This module integrates with Tomorrow.io API to fetch:
 API Documentation: https://docs.tomorrow.io/reference/welcome
 """
 
+import asyncio
 import httpx
+import orjson
+import numpy as np
 from datetime import datetime
-from typing import Optional, Dict, Any, List
-from pydantic import BaseModel
+from typing import Optional, Dict, Any, List, Tuple
+from pydantic import BaseModel, ConfigDict
 from config import settings
+from services.http_client import get_tomorrowio_client, tomorrowio_rate_limit
+from services.cache import async_ttl_cache
+from services.retry import retry_transient
+from services.risk_kernel import SUMMARY_DAYS, blister_streak
 
 
 # ===== Data Models =====
 
 class WeatherData(BaseModel):
     """Real-time weather data from Tomorrow.io"""
+    model_config = ConfigDict(frozen=True)
+    
     temperature: float
     feels_like: float
     humidity: float
@@ -49,6 +58,8 @@ class ForecastDay(BaseModel):
 
 class RiskAssessment(BaseModel):
     """Blister Blight disease risk assessment"""
+    model_config = ConfigDict(frozen=True)
+    
     risk_level: str  # HIGH, MODERATE, LOW
     details: str
     consecutive_risk_days: int
@@ -57,6 +68,8 @@ class RiskAssessment(BaseModel):
 
 # ===== Tomorrow.io API Client =====
 
+@async_ttl_cache(ttl=settings.UPSTREAM_CACHE_TTL, maxsize=1024)
+@retry_transient
 async def fetch_realtime_weather(lat: float, lon: float) -> Dict[str, Any]:
     """
     Fetch current weather conditions from Tomorrow.io.
@@ -68,19 +81,21 @@ async def fetch_realtime_weather(lat: float, lon: float) -> Dict[str, Any]:
     Returns:
         Raw JSON response from Tomorrow.io realtime endpoint
     """
-    url = f"{settings.TOMORROWIO_BASE_URL}/weather/realtime"
     params = {
         "location": f"{lat},{lon}",
         "apikey": settings.TOMORROWIO_API_KEY,
         "units": "metric"
     }
     
-    async with httpx.AsyncClient(timeout=15.0) as client:
-        response = await client.get(url, params=params)
-        response.raise_for_status()
-        return response.json()
+    client = get_tomorrowio_client()
+    async with tomorrowio_rate_limit():
+        response = await client.get("/weather/realtime", params=params, timeout=15.0)
+    response.raise_for_status()
+    return orjson.loads(response.content)
 
 
+@async_ttl_cache(ttl=settings.UPSTREAM_CACHE_TTL, maxsize=1024)
+@retry_transient
 async def fetch_forecast(
     lat: float,
     lon: float,
@@ -99,7 +114,6 @@ async def fetch_forecast(
     Returns:
         Raw JSON response from Tomorrow.io timeline endpoint
     """
-    url = f"{settings.TOMORROWIO_BASE_URL}/timelines"
     
     # Select fields based on what we need for tea estate monitoring
     fields = [
@@ -123,46 +137,97 @@ async def fetch_forecast(
         "units": "metric"
     }
     
-    async with httpx.AsyncClient(timeout=15.0) as client:
-        response = await client.get(url, params=params)
-        response.raise_for_status()
-        return response.json()
+    client = get_tomorrowio_client()
+    async with tomorrowio_rate_limit():
+        response = await client.get("/timelines", params=params, timeout=15.0)
+    response.raise_for_status()
+    return orjson.loads(response.content)
+
+
+# Daily fields shared by the risk endpoint (temperature, humidity, weather code)
+# and the flood alerts (floodRiskIndex), so both are served by one request
+_COMBINED_FIELDS = ("temperature", "humidity", "weatherCode", "floodRiskIndex")
+_COMBINED_TIMESTEPS = ("1d",)
+
+
+@async_ttl_cache(ttl=settings.UPSTREAM_CACHE_TTL, maxsize=1024)
+@retry_transient
+async def fetch_combined_timeline(lat: float, lon: float) -> Dict[str, Any]:
+    """
+    Fetch the daily timeline used by both risk analysis and flood alerts.
+    
+    One cached Timeline API call replaces separate forecast and flood-risk
+    requests; callers take the slice they need with timeline_intervals().
+    Concurrent callers for the same location share a single upstream call.
+    
+    Args:
+        lat: Latitude coordinate
+        lon: Longitude coordinate
+        
+    Returns:
+        Raw JSON response from Tomorrow.io timeline endpoint
+    """
+    params = {
+        "location": f"{lat},{lon}",
+        "apikey": settings.TOMORROWIO_API_KEY,
+        "fields": ",".join(_COMBINED_FIELDS),
+        "timesteps": ",".join(_COMBINED_TIMESTEPS),
+        "units": "metric"
+    }
+    
+    client = get_tomorrowio_client()
+    async with tomorrowio_rate_limit():
+        response = await client.get("/timelines", params=params, timeout=15.0)
+    response.raise_for_status()
+    return orjson.loads(response.content)
+
+
+def timeline_intervals(timeline_data: Dict[str, Any], timestep: str) -> List[Dict[str, Any]]:
+    """Intervals of the `timestep` timeline in a Timeline API response ([] if absent)."""
+    for timeline in timeline_data.get('data', {}).get('timelines', []):
+        if timeline.get('timestep') == timestep:
+            return timeline.get('intervals', [])
+    return []
 
 
 # ===== Weather Code Mapping =====
 
+# Weather codes: https://docs.tomorrow.io/reference/data-layers-weather-codes
+_WEATHER_ICONS: Dict[int, str] = {
+    1000: "☀️",  # Clear
+    1100: "🌤️",  # Mostly Clear
+    1101: "⛅",  # Partly Cloudy
+    1102: "☁️",  # Mostly Cloudy
+    1001: "☁️",  # Cloudy
+    2000: "🌫️",  # Fog
+    2100: "🌫️",  # Light Fog
+    4000: "🌧️",  # Drizzle
+    4001: "🌧️",  # Rain
+    4200: "🌧️",  # Light Rain
+    4201: "🌧️",  # Heavy Rain
+    5000: "❄️",  # Snow
+    5001: "❄️",  # Flurries
+    5100: "❄️",  # Light Snow
+    5101: "❄️",  # Heavy Snow
+    6000: "🌧️❄️",  # Freezing Drizzle
+    6001: "🌧️❄️",  # Freezing Rain
+    6200: "🌧️❄️",  # Light Freezing Rain
+    6201: "🌧️❄️",  # Heavy Freezing Rain
+    7000: "🧊",  # Ice Pellets
+    7101: "🧊",  # Heavy Ice Pellets
+    7102: "🧊",  # Light Ice Pellets
+    8000: "⛈️",  # Thunderstorm
+}
+_ICON_GET = _WEATHER_ICONS.get
+
+
 def get_weather_icon(weather_code: int) -> str:
     """
     Map Tomorrow.io weather code to emoji icon.
     
     Weather codes: https://docs.tomorrow.io/reference/data-layers-weather-codes
     """
-    code_map = {
-        1000: "☀️",  # Clear
-        1100: "🌤️",  # Mostly Clear
-        1101: "⛅",  # Partly Cloudy
-        1102: "☁️",  # Mostly Cloudy
-        1001: "☁️",  # Cloudy
-        2000: "🌫️",  # Fog
-        2100: "🌫️",  # Light Fog
-        4000: "🌧️",  # Drizzle
-        4001: "🌧️",  # Rain
-        4200: "🌧️",  # Light Rain
-        4201: "🌧️",  # Heavy Rain
-        5000: "❄️",  # Snow
-        5001: "❄️",  # Flurries
-        5100: "❄️",  # Light Snow
-        5101: "❄️",  # Heavy Snow
-        6000: "🌧️❄️",  # Freezing Drizzle
-        6001: "🌧️❄️",  # Freezing Rain
-        6200: "🌧️❄️",  # Light Freezing Rain
-        6201: "🌧️❄️",  # Heavy Freezing Rain
-        7000: "🧊",  # Ice Pellets
-        7101: "🧊",  # Heavy Ice Pellets
-        7102: "🧊",  # Light Ice Pellets
-        8000: "⛈️",  # Thunderstorm
-    }
-    return code_map.get(weather_code, "🌤️")
+    return _ICON_GET(weather_code, "🌤️")
 
 
 # ===== Blister Blight Risk Calculation =====
@@ -182,44 +247,35 @@ def calculate_blister_blight_risk(daily_data: List[Dict]) -> RiskAssessment:
     Returns:
         RiskAssessment with risk level and recommendations
     """
-    forecast_summary = []
-    current_streak = 0
-    max_streak = 0
-    streak_start = None
-    streak_end = None
+    days = daily_data[:7]  # Analyze 7 days
+    values = [interval.get('values') or {} for interval in days]
+    start_times = [interval.get('startTime', '') for interval in days]
     
-    for interval in daily_data[:7]:  # Analyze 7 days
-        values = interval.get('values', {})
-        start_time = interval.get('startTime', '')
-        
-        # Extract weather metrics
-        temperature = values.get('temperature', 30)
-        humidity = values.get('humidity', 50)
-        weather_code = values.get('weatherCode', 1000)
-        
-        # Check risk conditions for Blister Blight
-        # (favors cool, humid conditions)
-        is_risk_day = humidity > 90 and temperature < 25
-        
-        # Track consecutive risk days
-        if is_risk_day:
-            current_streak += 1
-            if current_streak == 1:
-                streak_start = start_time
-            streak_end = start_time
-            if current_streak > max_streak:
-                max_streak = current_streak
-        else:
-            current_streak = 0
-        
-        # Build forecast summary
-        forecast_summary.append({
-            "date": start_time[:10] if start_time else "Unknown",
-            "temperature": round(temperature, 1),
-            "humidity": round(humidity, 1),
-            "weather_icon": get_weather_icon(weather_code),
-            "is_risk_day": is_risk_day
-        })
+    # Extract weather metrics
+    temperatures = [v.get('temperature', 30) for v in values]
+    humidities = [v.get('humidity', 50) for v in values]
+    
+    # Find consecutive risk days for Blister Blight (favors cool, humid
+    # conditions) in the compiled kernel
+    max_streak, start_idx, end_idx, risk_flags = blister_streak(
+        np.asarray(humidities, dtype=np.float64),
+        np.asarray(temperatures, dtype=np.float64)
+    )
+    max_streak = int(max_streak)
+    streak_start = start_times[start_idx] if max_streak else None
+    streak_end = start_times[end_idx] if max_streak else None
+    
+    # Build forecast summary; only the days shown in the UI are formatted
+    forecast_summary = [
+        {
+            "date": start_times[i][:10] if start_times[i] else "Unknown",
+            "temperature": round(temperatures[i], 1),
+            "humidity": round(humidities[i], 1),
+            "weather_icon": get_weather_icon(values[i].get('weatherCode', 1000)),
+            "is_risk_day": bool(risk_flags[i])
+        }
+        for i in range(min(len(days), SUMMARY_DAYS))
+    ]
     
     # Determine risk level
     if max_streak >= 3:
@@ -247,7 +303,7 @@ def calculate_blister_blight_risk(daily_data: List[Dict]) -> RiskAssessment:
         risk_level=risk_level,
         details=details,
         consecutive_risk_days=max_streak,
-        forecast_summary=forecast_summary[:3]  # Return 3-day summary for UI
+        forecast_summary=forecast_summary
     )
 
 
@@ -268,12 +324,11 @@ async def get_weather_risk(lat: float, lon: float) -> RiskAssessment:
         RiskAssessment with complete risk analysis
     """
     try:
-        # Fetch daily forecast from Tomorrow.io
-        forecast_data = await fetch_forecast(lat, lon, timesteps="1d", days=7)
+        # Fetch daily forecast from Tomorrow.io (shared with flood alerts)
+        forecast_data = await fetch_combined_timeline(lat, lon)
         
         # Extract timeline data
-        timelines = forecast_data.get('data', {}).get('timelines', [])
-        if not timelines:
+        if not forecast_data.get('data', {}).get('timelines'):
             return RiskAssessment(
                 risk_level="LOW",
                 details="Unable to fetch forecast data. Please try again later.",
@@ -282,7 +337,7 @@ async def get_weather_risk(lat: float, lon: float) -> RiskAssessment:
             )
         
         # Get daily intervals
-        daily_intervals = timelines[0].get('intervals', [])
+        daily_intervals = timeline_intervals(forecast_data, "1d")
         
         if not daily_intervals:
             return RiskAssessment(
@@ -309,3 +364,31 @@ async def get_weather_risk(lat: float, lon: float) -> RiskAssessment:
             consecutive_risk_days=0,
             forecast_summary=[]
         )
+
+
+async def get_weather_risk_many(
+    coords: List[Tuple[float, float]],
+    concurrency: int = 20
+) -> List[RiskAssessment]:
+    """
+    Get weather risk assessments for many locations concurrently.
+    
+    Upstream calls fan out over the shared HTTP/2 client, with at most
+    `concurrency` in flight at once to avoid Tomorrow.io throttling.
+    
+    Args:
+        coords: List of (lat, lon) pairs
+        concurrency: Maximum number of simultaneous assessments
+        
+    Returns:
+        RiskAssessment per location, in the same order as `coords`
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def _one(lat: float, lon: float) -> RiskAssessment:
+        async with semaphore:
+            return await get_weather_risk(lat, lon)
+    
+    # get_weather_risk turns failures into LOW-risk fallbacks, so one bad
+    # location never fails the whole batch
+    return await asyncio.gather(*(_one(lat, lon) for lat, lon in coords))
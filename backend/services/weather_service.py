@@ -3,12 +3,17 @@ Weather Service for Ceylon Tea Intelligence Platform.
 Integrates with Meteosource API for forecast data and calculates Blister Blight risk.
 """
 
+import re
 import httpx
+import orjson
+import numpy as np
 from typing import Literal, Optional
 from datetime import datetime
 from pydantic import BaseModel
 
 from config import settings
+from services.http_client import get_http_client
+from services.risk_kernel import SUMMARY_DAYS, blister_streak
 
 
 # Pydantic Models
@@ -50,27 +55,37 @@ async def fetch_forecast(lat: float, lon: float) -> dict:
         "key": settings.METEOSOURCE_API_KEY
     }
     
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        response = await client.get(url, params=params)
-        response.raise_for_status()
-        return response.json()
+    client = get_http_client()
+    response = await client.get(url, params=params, timeout=30.0)
+    response.raise_for_status()
+    return orjson.loads(response.content)
+
+
+# Weather summary keywords, matched case-insensitively in a single pass
+_ICON_RE = re.compile(
+    r"(?P<rain>rain|shower)|(?P<cloud>cloud)|(?P<sun>sun|clear)|(?P<storm>storm|thunder)|(?P<fog>fog|mist)",
+    re.IGNORECASE
+)
+
+# Keyword groups in priority order (first group found in the summary wins)
+_GROUP_ICONS = (
+    ("rain", "🌧️"),
+    ("cloud", "☁️"),
+    ("sun", "☀️"),
+    ("storm", "⛈️"),
+    ("fog", "🌫️"),
+)
 
 
 def get_weather_icon(summary: str) -> str:
     """Map weather summary to icon."""
-    summary_lower = summary.lower() if summary else ""
-    if "rain" in summary_lower or "shower" in summary_lower:
-        return "🌧️"
-    elif "cloud" in summary_lower:
-        return "☁️"
-    elif "sun" in summary_lower or "clear" in summary_lower:
-        return "☀️"
-    elif "storm" in summary_lower or "thunder" in summary_lower:
-        return "⛈️"
-    elif "fog" in summary_lower or "mist" in summary_lower:
-        return "🌫️"
-    else:
+    if not summary:
         return "🌤️"
+    found = {match.lastgroup for match in _ICON_RE.finditer(summary)}
+    for group, icon in _GROUP_ICONS:
+        if group in found:
+            return icon
+    return "🌤️"
 
 
 def calculate_blister_blight_risk(daily_data: list) -> RiskAssessment:
@@ -88,45 +103,33 @@ def calculate_blister_blight_risk(daily_data: list) -> RiskAssessment:
     Returns:
         RiskAssessment with risk level, details, and forecast summary
     """
-    forecast_summary = []
-    risk_days = []
-    current_streak = 0
-    max_streak = 0
-    streak_start_date = None
-    streak_end_date = None
+    days = daily_data[:7]  # Analyze 7 days
+    dates = [day.get("day", "Unknown") for day in days]
+    all_days = [day.get("all_day") or {} for day in days]
     
-    for day in daily_data[:7]:  # Analyze 7 days
-        day_date = day.get("day", "Unknown")
-        all_day = day.get("all_day", {})
-        
-        # Extract weather data
-        temperature = all_day.get("temperature", 30)
-        humidity = all_day.get("humidity", 50)
-        summary = day.get("summary", "")
-        
-        # Check if day meets risk conditions
-        is_risk_day = humidity > 90 and temperature < 25
-        
-        # Track consecutive risk days
-        if is_risk_day:
-            current_streak += 1
-            if current_streak == 1:
-                streak_start_date = day_date
-            streak_end_date = day_date
-            if current_streak > max_streak:
-                max_streak = current_streak
-        else:
-            current_streak = 0
-        
-        risk_days.append(is_risk_day)
-        
-        forecast_summary.append({
-            "date": day_date,
-            "temperature": temperature,
-            "humidity": humidity,
-            "weather_icon": get_weather_icon(summary),
-            "is_risk_day": is_risk_day
-        })
+    # Extract weather data
+    temperatures = [all_day.get("temperature", 30) for all_day in all_days]
+    humidities = [all_day.get("humidity", 50) for all_day in all_days]
+    
+    # Track consecutive risk days in the shared numeric kernel
+    max_streak, start_idx, end_idx, risk_flags = blister_streak(
+        np.asarray(humidities, dtype=np.float64),
+        np.asarray(temperatures, dtype=np.float64)
+    )
+    max_streak = int(max_streak)
+    streak_start_date = dates[start_idx] if max_streak else None
+    streak_end_date = dates[end_idx] if max_streak else None
+    
+    forecast_summary = [
+        {
+            "date": dates[i],
+            "temperature": temperatures[i],
+            "humidity": humidities[i],
+            "weather_icon": get_weather_icon(days[i].get("summary", "")),
+            "is_risk_day": bool(risk_flags[i])
+        }
+        for i in range(min(len(days), SUMMARY_DAYS))
+    ]
     
     # Determine risk level
     if max_streak >= 3:
@@ -143,7 +146,7 @@ def calculate_blister_blight_risk(daily_data: list) -> RiskAssessment:
         risk_level=risk_level,
         details=details,
         consecutive_risk_days=max_streak,
-        forecast_summary=forecast_summary[:3]  # Return only 3-day summary for UI
+        forecast_summary=forecast_summary
     )
 
 